@@ -9,13 +9,19 @@ Metadata
 """
 
 # Standard
-import copy
 import csv
+import itertools
 import logging
+import math
+import os
+import string
 import time
+from array import array
+from collections.abc import Iterator
 
 # Local imports
 from cliques.graph import Graph
+from cliques.search import degeneracy_order, iter_cliques, unflatten
 from cliques.word_node import WordNode
 
 
@@ -23,12 +29,14 @@ class Clique:
     """Computes cliques using a word graph"""
 
     MAX_LEN: int = 26
+    WRITE_BUFFER: int = 1 << 20  # bytes buffered by write_cliques()
 
     def __init__(
         self,
         words: list[str],
         delim: str = ",",
         fuzzy: bool = True,
+        workers: int | None = None,
     ):
         """
         Initializes Clique object.
@@ -36,7 +44,8 @@ class Clique:
         Parameters
         ----------
         words : list[str]
-            the word list to be used to search for cliques.
+            the word list to be used to search for cliques. Only words of the letters a-z are
+            used, ignoring case; others (e.g., "home-brew") are skipped (see Graph).
         delim : str, optional
             CSV delimiter, by default ','
         fuzzy : bool, optional
@@ -44,28 +53,59 @@ class Clique:
             False gives strict cliques only (no repeated letters)
             True enables vowels to overlap at most once.
             By default False
-        log_level : int, optional
-            Logging level for Python's logging package.
-            By default logging.INFO
+        workers : int, optional
+            Number of processes used to search for cliques. 1 searches in this process.
+            If None, uses the number of CPUs this process may run on. By default None
         """
         # save input values
         self.words = words
         self.fuzzy = fuzzy
         self.delim = delim
+        self.workers = workers if workers is not None else self._available_cpus()
+
+        # bucket the words by length once, so each Graph only scans words of its length
+        self._words_by_length: dict[int, list[str]] = {}
+        for word in words:
+            word = word.strip()
+            self._words_by_length.setdefault(len(word), []).append(word)
 
         # setup for later calculations
-        self.graph: Graph
+        self.graph: Graph | None = None  # None when no word has the length
         self.nodes: list[WordNode]
-        self.cliques: list[list[int]]
-        self.word_cliques: list[list[str]]
+        self.masks: list[int]
+        self.node_words: list[list[str]]
         self.length: int
+        self._cliques: array | None = None
+        self._graph_key: tuple[int, bool] | None = None  # (length, fuzzy) of self.graph
+        self._graph_time: float = 0.0
 
         # logging
         self._logger = logging.getLogger("Clique")
 
+    @property
+    def word_cliques(self) -> list[list[str]]:
+        """
+        All cliques found by the last compute_cliques(), as lists of words.
+
+        Searched on first access, and kept afterwards as one flat array("i") of indexes into
+        self.nodes, rather than as lists of str. write_cliques() does not need this, and
+        streams the cliques to file instead.
+
+        Nodes can stand for several anagrams (see Graph), so each clique of nodes gives one
+        clique of words per combination of their anagrams.
+
+        The words of each clique are in node order, i.e., the order in which each node's first
+        word occurs in the word list; an anagram takes the slot of that first word. The cliques
+        are in the order the search finds them.
+        """
+        n = self._clique_size(self.length)
+        cliques = unflatten(self._flat_cliques(), n)
+        return [words for cliq in cliques for words in self._expand(cliq)]
+
     def compute_cliques(self, length: int = 5):
         """
-        Finds all cliques utilizing the provided word list for words of length specified by length.
+        Prepares to find all cliques utilizing the provided word list for words of length
+        specified by length.
 
         Cliques will be limited by a specific factor: alphabet size. Assumes English, so 26 letters.
             - All cliques of words with length 5 must have 5 words in the clique, as 5x5=25.
@@ -75,13 +115,19 @@ class Clique:
         Graphs are utilized to set up the "neighbors" of each word. Neighbors are those words
         with which the current word has no letters in common. (e.g., "fjord" and "waltz")
 
+        The graph is computed here; calling this again with the same length (and fuzziness)
+        as the last call reuses it. The cliques themselves are searched lazily, when they are
+        consumed by write_cliques() (streamed straight to file), iter_word_cliques(), or by
+        self.word_cliques.
+
         If no cliques are found, then another method can be used: fuzzy search.
         This allows some overlap in the cliques.
 
         Raises
         ------
         ValueError
-            If length is not between 1 and 26.
+            If length is not between 1 and 26, or leaves room for fewer than 2 words
+            (i.e., over 13).
         """
         # error checks
         # ... length is a positive number between 1 and 26.
@@ -90,167 +136,214 @@ class Clique:
                 f"[***] ERROR: Length must be a number between 1 and 26. Got: {length}"
             )
 
+        # ... n must be a non-negative int! (lengths over 13 leave room for one word)
+        num_words = self._clique_size(length)
+        if num_words < 2:
+            raise ValueError(f"[***] n must be an int larger than 1. Got: {num_words}")
+
+        # ... warn about n being too large
+        if num_words > 8:
+            self._logger.warning(
+                "[**] WARNING: n > 8 means you have word length of 2. I recommend not doing this."
+            )
+
         # save attribute
         self.length = length
+        self._cliques = None
 
-        # create graph
+        # create graph, or reuse the last one if it was for this length. only the last
+        # graph is kept, so memory stays bounded when going over many lengths
         g_start = time.time()
-        self._logger.info("[*] Computing Graph for length %d...", length)
-        self.graph = Graph(
-            words=self.words,
-            length=length,
-            fuzzy=self.fuzzy,
-            log_level=self._logger.getEffectiveLevel(),
-        )
-        self.graph.compute_graph()
-        self.nodes = self.graph.nodes  # bring it up a level due to laziness
-        g_comp = time.time() - g_start
-        self._logger.info("[*] Graphs computed in %.3f seconds.", g_comp)
-
-        # compute cliques
-        c_start = time.time()
-        self._logger.info(
-            "[*] Computing all cliques for length %d. This may take a while...", length
-        )
-
-        # ... compute the cliques
-        self.cliques = self._get_clique_list(length)
-        cliques_found = len(self.cliques)
-        if cliques_found == 0:
-            self._logger.info("[*] No cliques found.")
-
-        # ... convert indexes to words
-        self._get_word_repr()
+        key = (length, self.fuzzy)
+        words = self._words_by_length.get(length)
+        if key == self._graph_key:
+            self._logger.info("[*] Reusing Graph for length %d...", length)
+        elif words:
+            self._logger.info("[*] Computing Graph for length %d...", length)
+            self.graph = Graph(
+                words=words,
+                length=length,
+                fuzzy=self.fuzzy,
+                log_level=self._logger.getEffectiveLevel(),
+            )
+            self.graph.compute_graph()
+            self._graph_key = key
+        else:
+            # ... no words of this length, so no Graph to build, and no cliques
+            self._logger.info("[*] No words of length %d. Skipping Graph.", length)
+            self.graph = None
+            self._graph_key = None
+
+        if self.graph is None:
+            self.nodes = []
+            self.masks = []
+        else:
+            self.nodes = self.graph.nodes  # bring it up a level due to laziness
+            self.masks = self.graph.node_masks
+        self.node_words = [node.words for node in self.nodes]
+        self._graph_time = time.time() - g_start
+        self._logger.info("[*] Graphs computed in %.3f seconds.", self._graph_time)
+
+    def iter_word_cliques(self) -> Iterator[list[str]]:
+        """
+        Yields the cliques found by the last compute_cliques(), as lists of words.
 
-        # ... log
-        c_comp = time.time() - c_start
-        self._logger.info("[*] Cliques computed in %.3f seconds.", c_comp)
+        Cliques are yielded as they are found, unless self.word_cliques was already computed,
+        and are not kept afterwards; stopping early also stops the search.
 
-        # exit log
-        self._logger.info("[*] Total Execution Time: %.3f seconds.", c_comp + g_comp)
+        Yields
+        ------
+        list[str]
+            A clique of words.
+        """
+        for cliq in self._node_cliques():
+            yield from self._expand(cliq)
 
     def write_cliques(self, filepath: str):
         """
         Writes this object's cliques to file at CSV. Will overwrite.
 
+        Cliques are written as they are found, unless self.word_cliques was already computed.
+
         Parameters
         ----------
         filepath : str
             the filepath to write.
         """
-        if len(self.word_cliques) == 0:
+        cliques = self._node_cliques()
+
+        # peek, so that no file is created without cliques
+        first = next(cliques, None)
+        if first is None:
             self._logger.debug("[*] Skipping write-to-file. No cliques.")
             return
 
-        # generate dict format
-        output: list[dict] = []
-        for cliq in self.word_cliques:
-            repeats, missing = self._get_repeats_and_missing(cliq)
-            output.append(
-                {
-                    "Clique": cliq,
-                    "Fuzzy": len(repeats) > 0,
-                    "Repeats": repeats,
-                    "Missing": missing,
-                }
-            )
-        fn = list(output[0].keys())
-
-        # open and write.
-        with open(filepath, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fn, delimiter=self.delim)
-            writer.writeheader()
-            writer.writerows(output)
+        # generate rows, one clique at a time. positional rows skip DictWriter's
+        # per-row field lookups; the columns are the same. anagrams have the same
+        # letters, so repeats and missing are computed (and formatted, as csv would
+        # with str()) once per clique of nodes.
+        node_words = self.node_words
+        expand = self._expand
+        get_repeats_and_missing = self._get_repeats_and_missing
+
+        def rows():
+            for cliq in itertools.chain((first,), cliques):
+                words = [node_words[idx][0] for idx in cliq]
+                repeats, missing = get_repeats_and_missing(words)
+                fields = (str(len(repeats) > 0), str(repeats), str(missing))
+                for words in expand(cliq):
+                    yield (words, *fields)
+
+        fn = ["Clique", "Fuzzy", "Repeats", "Missing"]
+
+        # open and write. rows are short, so a large buffer saves most write calls
+        with open(
+            filepath, "w", newline="", encoding="utf-8", buffering=self.WRITE_BUFFER
+        ) as f:
+            writer = csv.writer(f, delimiter=self.delim)
+            writer.writerow(fn)
+            writer.writerows(rows())
 
     #########################################
     #           HELPER FUNCTIONS            #
     #########################################
 
-    def _clique_layer_t(
-        self, n: int, prev_idx: list[int], prev_n: set[int], cl: list[list[int]]
-    ):
-        """generalizes the clique case to enable n-level clique computation."""
-        # error checking
-        # ... n must be a non-negative int!
-        if not isinstance(n, int) or n < 2:
-            raise ValueError(f"[***] n must be an int larger than 1. Got: {n}")
-
-        # ... warn about n being too large
-        if n > 8:
-            self._logger.warning(
-                "[**] WARNING: n > 8 means you have word length of 2. I recommend not doing this."
+    @staticmethod
+    def _available_cpus() -> int:
+        """CPUs this process may run on, which can be fewer than os.cpu_count()."""
+        # ... e.g., in containers, or under taskset. one worker per CPU of the machine
+        # would oversubscribe the ones actually available.
+        if hasattr(os, "sched_getaffinity"):
+            return len(os.sched_getaffinity(0)) or 1
+        return os.cpu_count() or 1
+
+    def _clique_size(self, length: int) -> int:
+        """Number of words in a clique of words with the given length."""
+        # example: 26 / 5 = 5.2 -> int(5.2) -> 5
+        return int(self.MAX_LEN / length)
+
+    def _expand(self, cliq: tuple[int, ...]) -> Iterator[list[str]]:
+        """Yields the word cliques of a clique of nodes, one per combination of anagrams."""
+        for words in itertools.product(*map(self.node_words.__getitem__, cliq)):
+            yield list(words)
+
+    def _node_cliques(self) -> Iterator[tuple[int, ...]]:
+        """The cliques of nodes; from self._cliques if already searched, or searched lazily."""
+        if self._cliques is not None:
+            return unflatten(self._cliques, self._clique_size(self.length))
+        return self._iter_cliques(self.length)
+
+    def _flat_cliques(self) -> array:
+        """Returns self._cliques, the flattened cliques, searching for them first if needed."""
+        if self._cliques is None:
+            self._cliques = array(
+                "i", itertools.chain.from_iterable(self._iter_cliques(self.length))
             )
+        return self._cliques
 
-        # handle if n < 3 (i.e., you want a clique of 2 words)
-        if n == 2:
-            self._clique_loop_end(cl, prev_idx, prev_n)
-            return  # no need to execute further. this is a base case!
-
-        # now, run through the general algorithm
-        for next_idx in prev_n:
-            if next_idx < prev_idx[-1]:
-                continue
-
-            # remaining candidates will be in intersection:
-            next_n = prev_n & self.nodes[next_idx].neighbors
-
-            # # # BASE CASE # # #
-
-            # if n-2 is 1 (i.e., n is 3 or lower for robustness), then we need to call the loop end
-            # this represents the last "layer" of words to add to the clique.
-            if n <= 3:  # or, n <= 3
-                idx_copy = copy.copy(prev_idx)
-                idx_copy.append(next_idx)
-                self._clique_loop_end(cl, idx_copy, next_n)
-                return  # loop is over!
-
-            # check if number of neighbors in next_n is large enough
-            if len(next_n) < (n - 2):
-                continue
-
-            # call the next layer (recursively)
-            idx_copy = copy.copy(prev_idx)
-            idx_copy.append(next_idx)
-            self._clique_layer_t(n - 1, idx_copy, next_n, cl)
-
-    def _clique_loop_end(
-        self, cl: list[list[int]], prev_idx: list[int], prev_n: set[int]
-    ):
-        """represents the final loop, where all clique indexes are aggregated."""
-        prev = prev_idx[-1]
-        for r in prev_n:
-            if r < prev:
-                continue
-            prev_copy = copy.deepcopy(prev_idx)
-            prev_copy.append(r)
-            cl.append(prev_copy)
-
-    def _get_clique_list(self, length: int):
+    def _iter_cliques(self, length: int) -> Iterator[tuple[int, ...]]:
         """
-        Interface function to call the specific helper function to find how many cliques.
+        Interface function to call the specific helper function to find all cliques.
+
+        A generator; the search runs as the cliques are consumed.
 
         Parameters
         ----------
         length : int
             What word length of the list is being calculated.
 
-        Returns
-        -------
-        list[int]
-            List of cliques. Each entry in this list are the indexes into self.nodes
+        Yields
+        ------
+        tuple[int, ...]
+            A clique. Each entry in the tuple is an index into self.nodes, in increasing
+            order. The cliques themselves come in the order they are found.
         """
 
-        # first, determine which clique length must be chosen
-        # example: 26 / 5 = 5.2 -> int(5.2) -> 5
-        num_words = int(self.MAX_LEN / length)
+        num_words = self._clique_size(length)
         self._logger.debug("[*] Computing cliques of %d words...", num_words)
 
-        cl = []
-        for i, node in enumerate(self.nodes):
-            ni = node.neighbors
-            # call the clique template function with num_words
-            self._clique_layer_t(n=num_words, prev_idx=[i], prev_n=ni, cl=cl)
-        return cl
+        # compute cliques
+        c_start = time.time()
+        self._logger.info(
+            "[*] Computing all cliques for length %d. This may take a while...", length
+        )
+
+        # fuzzy neighbors are not symmetric, so pivoting does not apply, and the
+        # search relies on index order.
+        if self.fuzzy:
+            seeds = list(range(len(self.masks)))
+        # strict graph: walk the nodes in degeneracy order. only neighbors later in the
+        # order are candidates, so each clique is found once and p stays small.
+        else:
+            seeds = degeneracy_order(self.masks)
+
+        # ... stream the cliques. each counts once per combination of anagrams. strict
+        # cliques come out in degeneracy order, so their nodes are put back in index
+        # order (i.e., the order of each node's first word in the list), as fuzzy
+        # cliques already are. anagrams take the slot of their node's first word.
+        get_count = [len(words) for words in self.node_words].__getitem__
+        in_order = not self.fuzzy
+        cliques_found = 0
+        for cliq in iter_cliques(
+            self.masks, seeds, n=num_words, pivot=not self.fuzzy, workers=self.workers
+        ):
+            if in_order:
+                cliq = tuple(sorted(cliq))
+            cliques_found += math.prod(map(get_count, cliq))
+            yield cliq
+        if cliques_found == 0:
+            self._logger.info("[*] No cliques found.")
+
+        # ... log
+        c_comp = time.time() - c_start
+        self._logger.info(
+            "[*] %d cliques computed in %.3f seconds.", cliques_found, c_comp
+        )
+
+        # exit log
+        self._logger.info(
+            "[*] Total Execution Time: %.3f seconds.", c_comp + self._graph_time
+        )
 
     def _get_repeats_and_missing(self, words: list[str]) -> tuple[list[str], list[str]]:
         """
@@ -267,32 +360,18 @@ class Clique:
         list[str]
             list of repeated letters
         """
-        # first count up all letters
-        d = dict(zip("abcdefghijklmnopqrstuvwxyz", [0] * 26))
+        # first count up all letters, in a table indexed by letter (a = 0)
+        counts = bytearray(26)
         for word in words:
-            for letter in word:
-                d[letter.lower()] += 1  # frequency count
+            for letter in word.lower():
+                counts[ord(letter) - 97] += 1  # frequency count
 
         # then, create a list of repeated (freq > 1) and missing (freq == 0) letters
         repeats = []
         missing = []
-        for k, v in d.items():
+        for k, v in zip(string.ascii_lowercase, counts):
             if v > 1:
                 repeats.append(k)
             elif v == 0:
                 missing.append(k)
         return repeats, missing
-
-    def _get_word_repr(self):
-        """
-        Utilizes self.cliques (which has the indexes) to
-        generate self.word_cliques (which will have the words).
-        """
-        # loop through every clique
-        self.word_cliques = []
-        for wc_idx, cliq in enumerate(self.cliques):
-            self.word_cliques.append([])
-
-            # loop through every word in cliq
-            for idx in cliq:
-                self.word_cliques[wc_idx].append(self.nodes[idx].word)
@@ -10,17 +10,32 @@ Metadata
 
 # Standard
 import csv
+import itertools
 import logging
+import string
 import time
 
 # Local
-from cliques.util import CliqueUtils
 from cliques.word_node import WordNode
 
+# bit of each letter, in the char_mask layout of WordNode
+_CHAR_BITS: dict[str, int] = {ch: 1 << (ord(ch) - 97) for ch in string.ascii_lowercase}
+
+# translates the digits of bin() to bytes 0 and 1. see _mask_to_set
+_BIN_TO_BYTES = bytes.maketrans(b"01", b"\x00\x01")
+
 
 class Graph:
     """
     Graph data structure.
+
+    Attributes
+    ----------
+    nodes : list[WordNode]
+        the nodes of the graph. In strict graphs, a node is a set of letters: anagrams share
+        one node, and node.words lists all of them. In fuzzy graphs, each word is a node.
+    node_masks : list[int]
+        neighbor bitmask of each node, see compute_graph()
     """
 
     def __init__(
@@ -37,6 +52,8 @@ class Graph:
         ----------
         words : list[str]
             List of words. Should be same length, and stripped (not required).
+            Only words of the letters a-z are used, ignoring case; others (e.g., "home-brew")
+            are skipped, as are words with a repeated letter.
         length : int
             Length of the words from the list to be computed.
             Allows providing a list of words with variable length, but only want to compute
@@ -70,10 +87,13 @@ class Graph:
 
         # to be created
         self.nodes: list[WordNode] = []
+        self.node_masks: list[int] = []
 
-        # create logger
+        # create logger. the logger is shared by every Graph, and setLevel() clears the
+        # logging module's level cache, so only set it when it changes.
         self.logger = logging.getLogger("Graph")
-        self.logger.setLevel(log_level)
+        if self.logger.level != log_level:
+            self.logger.setLevel(log_level)
 
         # initialize nodes with words list
         self._init_nodes()
@@ -85,41 +105,63 @@ class Graph:
         When fuzzy search is active, allows for vowels to overlap, enabling cliques to be found
         for situations where there otherwise would be no existing cliques (e.g., for a clique
         of words with length 3, which requires 8 words, but there are only 5 vowels!).
+        Each word gets at most 3 such neighbors, each sharing a different vowel.
 
         When fuzzy search is disabled, only strict cliques are found, where all letters are unique
+
+        Alongside each node's neighbor set, node.neighbors_bits holds the same neighbors as an
+        int bitmask (bit j is set iff j is a neighbor), for fast intersections. self.node_masks
+        lists these bitmasks in node order, for the clique search.
         """
         start = time.time()
 
         # max fuzzy count per node
         max_fuzzy = 3
 
+        # transpose the words into one bitmask per letter, of the nodes that contain it.
+        # this way, all the pairs of a node are tested at once, by big int ORs that run
+        # over all nodes a machine word at a time, rather than a node at a time.
+        # letters are compared ignoring case, as in the char masks.
+        letter_nodes = [0] * 26
+        for idx, node in enumerate(self.nodes):
+            for ch in node.word.lower():
+                letter_nodes[ord(ch) - 97] |= 1 << idx
+        everyone = (1 << len(self.nodes)) - 1
+
         # compute neighbors for each word; other words which have distinct letters
+        self.node_masks = []
         for node in self.nodes:
-            # extract node attributes.
-            char_set = node.char_set
-            neighbors = node.neighbors
-
-            # count how many fuzzy interactions
-            n_fuzzy = 0
-            vowels_left = "aeiou"
-
-            # iterate over all words again
-            for j in self.nodes:
-                # only add neighbors if they aren't duplicates.
-                intersection = char_set & j.char_set
-                if len(intersection) == 0:
-                    neighbors.add(self._get_word_index(j.word))
-                elif (
-                    self.fuzzy
-                    and len(intersection) == 1
-                    and CliqueUtils.pop_without_remove(intersection) in vowels_left
-                    and n_fuzzy < max_fuzzy
-                ):
-                    neighbors.add(self._get_word_index(j.word))
-                    vowels_left.replace(
-                        CliqueUtils.pop_without_remove(intersection), ""
-                    )
-                    n_fuzzy += 1
+            # nodes sharing each letter of this word. neighbors share none
+            letters = node.word.lower()
+            sharing = [letter_nodes[ord(ch) - 97] for ch in letters]
+            shared = 0
+            for nodes in sharing:
+                shared |= nodes
+            mask = everyone & ~shared
+
+            # ... or only share one letter, which is a vowel not shared yet. going
+            # over the nodes in order, the first node sharing only a given vowel takes
+            # it, so the fuzzy neighbors are the first such node of each vowel, up to
+            # max_fuzzy.
+            if self.fuzzy:
+                firsts = []
+                for k, ch in enumerate(letters):
+                    if ch not in "aeiou":
+                        continue
+                    others = 0
+                    for m, nodes in enumerate(sharing):
+                        if m != k:
+                            others |= nodes
+                    only = sharing[k] & ~others
+                    if only:
+                        firsts.append(only & -only)
+                for first in sorted(firsts)[:max_fuzzy]:
+                    mask |= first
+
+            # save the neighbors, as a set and as a bitmask
+            node.neighbors = _mask_to_set(mask)
+            node.neighbors_bits = mask
+            self.node_masks.append(mask)
 
         # output
         self.logger.info(
@@ -132,7 +174,11 @@ class Graph:
 
         Default filepath is f'{output_dir}/word_graph-{self.length}.csv
 
-        Single line format is: word,fuzzy,[neighbors[0], neighbors[1], ..., neighbors[-1]]
+        Single line format is: word,fuzzy,[neighbors[0], ..., neighbors[-1]],[words[0], ...]
+
+        There is one line per node, so the neighbors are line numbers, counted from 0. word is
+        the node's first word, and words all the words it stands for, which is more than one
+        for anagrams in strict graphs.
 
         Parameters
         ----------
@@ -151,11 +197,24 @@ class Graph:
             writer = csv.writer(f, delimiter=delim)
             for node in self.nodes:
                 writer.writerow(
-                    [node.word, self.fuzzy, str(list(sorted(node.neighbors)))]
+                    [
+                        node.word,
+                        self.fuzzy,
+                        str(list(sorted(node.neighbors))),
+                        str(node.words),
+                    ]
                 )
 
     def _init_nodes(self):
-        """Utilizes self.words to populate self.nodes."""
+        """
+        Utilizes self.words to populate self.nodes.
+
+        In strict graphs, neighbors only depend on the letters of a word, so anagrams (words
+        with the same char_mask) share one node, listing them all in node.words. Fuzzy graphs
+        keep one node per word, as their neighbors also depend on the order of the words.
+        """
+        # strict nodes, by char_mask
+        by_mask: dict[int, WordNode] = {}
 
         # loop over every word
         for word in self.words:
@@ -166,31 +225,36 @@ class Graph:
             if len(word) != self.length:
                 continue
 
-            # compute set representation of the word (i.e. the set of characters)
-            char_set = set(word)
-
-            # this word contains duplicate letters. move on
-            if len(char_set) != self.length:
+            # only words of the letters a-z, in any case, fit the bitmask (e.g., not
+            # "home-brew"). letters are compared ignoring case
+            letters = word.lower()
+            if not (letters.isascii() and letters.isalpha()):
                 continue
 
-            # append the WordNode. Empty set since neighbors is computed later
-            self.nodes.append(WordNode(word=word, neighbors=set(), char_set=char_set))
+            # compute bitmask representation of the word (i.e. the set of characters)
+            char_mask = 0
+            for ch in letters:
+                char_mask |= _CHAR_BITS[ch]
 
-    def _get_word_index(self, word: str):
-        """
-        Finds the index of word in the node list.
+            # this word contains duplicate letters. move on
+            if char_mask.bit_count() != self.length:
+                continue
 
-        Parameters
-        ----------
-        word : str
-            Word to lookup.
+            # this word is an anagram of a strict node. add it to that node
+            if not self.fuzzy and char_mask in by_mask:
+                by_mask[char_mask].words.append(word)
+                continue
 
-        Returns
-        -------
-        int, None
-            Returns idx of word if found. None otherwise.
-        """
-        for idx, node in enumerate(self.nodes):
-            if node.word == word:
-                return idx
-        return None
+            # append the WordNode. Empty set since neighbors is computed later
+            node = WordNode(
+                word=word, neighbors=set(), char_mask=char_mask, words=[word]
+            )
+            self.nodes.append(node)
+            if not self.fuzzy:
+                by_mask[char_mask] = node
+
+
+def _mask_to_set(mask: int) -> set[int]:
+    """the indexes of the set bits of mask, without scanning them one bit at a time."""
+    flags = bin(mask)[:1:-1].encode().translate(_BIN_TO_BYTES)  # flags[j] = bit j
+    return set(itertools.compress(range(len(flags)), flags))
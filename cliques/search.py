@@ -0,0 +1,445 @@
+"""
+Description
+-----------
+Clique search kernels.
+
+These work on plain neighbor bitmasks (bit j of masks[i] is set iff j is a neighbor of i)
+rather than on Clique or Graph objects, so the hot loops do no attribute lookups or
+method dispatch, and can run anywhere the masks are available.
+
+Metadata
+--------
+- Date: 2026.10.14
+"""
+
+# Standard
+import multiprocessing
+import sys
+from array import array
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+
+# seed chunks handed out per worker process; more than one evens out the load, as
+# seeds early in the order tend to have larger search trees.
+CHUNKS_PER_WORKER: int = 8
+
+# largest clique size given its own generated kernel. kernels nest one loop per node,
+# and Python caps statically nested blocks at 20; 13 covers every word length >= 2.
+MAX_UNROLLED: int = 13
+
+# search kernel: kernel(masks, i0, p0, cl). see get_kernel()
+Kernel = Callable[[list[int], int, int, list[tuple[int, ...]]], None]
+
+# generated kernels, keyed by (n, pivot)
+_kernels: dict[tuple[int, bool], Kernel] = {}
+
+# neighbor bitmasks, set once in each worker process by _init_worker
+_worker_masks: list[int] = []
+
+
+def iter_cliques(
+    masks: list[int], seeds: list[int], n: int, pivot: bool, workers: int = 1
+) -> Iterator[tuple[int, ...]]:
+    """
+    Finds all cliques of n nodes, searching from each seed in turn.
+
+    A generator; cliques are yielded as each seed (or, with workers, each chunk of seeds)
+    is searched, so all cliques are never held in memory at once.
+
+    Parameters
+    ----------
+    masks : list[int]
+        neighbor bitmasks of the graph.
+    seeds : list[int]
+        order in which nodes start a search. Must contain every node, and without pivot,
+        be in index order.
+    n : int
+        clique size. Must be at least 2.
+    pivot : bool
+        Whether to search with pivoting (strict graphs), or in index order (fuzzy graphs).
+        Either way, only nodes after a seed in seeds are candidates for its cliques.
+    workers : int, optional
+        Number of processes to split the seeds across. 1 searches in this process.
+        By default 1
+
+    Yields
+    ------
+    tuple[int, ...]
+        A clique, in seed order. Each entry holds the index of one of its nodes.
+    """
+    everything = (1 << len(masks)) - 1
+    if workers <= 1 or len(seeds) < 2 * workers:
+        later = everything
+        for i in seeds:
+            yield from _search_seeds(masks, [i], later, n, pivot)
+            later ^= 1 << i
+        return
+
+    # split the seeds into contiguous chunks, each with the nodes not yet searched
+    size = -(-len(seeds) // (workers * CHUNKS_PER_WORKER))
+    chunks = [seeds[start : start + size] for start in range(0, len(seeds), size)]
+    laters = []
+    later = everything
+    for chunk in chunks:
+        laters.append(later)
+        for i in chunk:
+            later ^= 1 << i
+
+    # fork on Linux shares masks with the workers without pickling them. elsewhere
+    # (e.g., macOS, where system libraries may run threads that fork does not carry
+    # over) the platform default is kept.
+    method = "fork" if sys.platform.startswith("linux") else None
+    ctx = multiprocessing.get_context(method)
+    ex = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(masks,),
+    )
+    try:
+        for part in ex.map(_search_chunk, chunks, laters, repeat(n), repeat(pivot)):
+            yield from unflatten(part, n)
+    finally:
+        # don't keep searching if the consumer stopped early
+        ex.shutdown(cancel_futures=True)
+
+
+def _init_worker(masks: list[int]):
+    """saves the neighbor bitmasks in a worker process."""
+    global _worker_masks
+    _worker_masks = masks
+
+
+def _search_chunk(seeds: list[int], later: int, n: int, pivot: bool) -> array:
+    """
+    searches a chunk of seeds in a worker process.
+
+    The cliques are returned flattened (see unflatten), which pickles far smaller than a
+    list of tuples.
+    """
+    cl = _search_seeds(_worker_masks, seeds, later, n, pivot)
+    return array("i", chain.from_iterable(cl))
+
+
+def unflatten(flat: array, n: int) -> Iterator[tuple[int, ...]]:
+    """
+    Yields the cliques of n nodes stored back to back in flat.
+
+    Parameters
+    ----------
+    flat : array
+        array("i") of node indexes, n per clique.
+    n : int
+        clique size.
+
+    Yields
+    ------
+    tuple[int, ...]
+        A clique.
+    """
+    # zip over n references to one iterator builds each tuple straight from the array,
+    # without slicing out a temporary array per clique first
+    yield from zip(*[iter(flat)] * n)
+
+
+def _search_seeds(
+    masks: list[int], seeds: list[int], later: int, n: int, pivot: bool
+) -> list[tuple[int, ...]]:
+    """
+    runs the search rooted at each seed in order.
+
+    later is the bitmask of nodes at or after seeds[0] in the seed order.
+    """
+    kernel = get_kernel(n, pivot)
+    cl: list[tuple[int, ...]] = []
+
+    # a seed needs at least n - 1 later neighbors, so seeds without them are skipped
+    # here, before the kernel call (and its pivot scan). degeneracy order puts them
+    # first, and the last n - 1 seeds of any order never have them.
+    for i in seeds:
+        later ^= 1 << i
+        p0 = masks[i] & later
+        if p0.bit_count() >= n - 1:
+            kernel(masks, i, p0, cl)
+    return cl
+
+
+def get_kernel(n: int, pivot: bool) -> Kernel:
+    """
+    Returns the search kernel for cliques of n nodes, generating it on first use.
+
+    A kernel is called as kernel(masks, i0, p0, cl): it appends to cl every clique rooted at
+    seed i0 whose other nodes come from the candidate bitmask p0. p0 must only hold nodes
+    after i0 in the seed order, which without pivot is the index order.
+
+    Generated kernels are the search of clique_stack unrolled into one nested loop per node,
+    with the prune thresholds inlined as constants. For example, the kernel without pivot
+    for n = 3 is:
+
+        def _kernel_3_layer(masks, i0, p0, cl):
+            emit = cl.append
+            c0 = p0
+            while c0:
+                b = c0 & -c0
+                c0 ^= b
+                i1 = b.bit_length() - 1
+                p1 = c0 & masks[i1]
+                while p1:
+                    b = p1 & -p1
+                    p1 ^= b
+                    emit((i0, i1, b.bit_length() - 1))
+
+    Above MAX_UNROLLED, clique_stack is used instead.
+
+    Parameters
+    ----------
+    n : int
+        clique size. Must be at least 2.
+    pivot : bool
+        Whether to search with pivoting (True), or in index order (False). see clique_stack
+
+    Returns
+    -------
+    Kernel
+        The search kernel.
+    """
+    key = (n, pivot)
+    if key in _kernels:
+        return _kernels[key]
+
+    if n > MAX_UNROLLED:
+
+        def kernel(masks: list[int], i0: int, p0: int, cl: list[tuple[int, ...]]):
+            clique_stack(masks, n, pivot, i0, p0, cl)
+
+    else:
+        name = f"_kernel_{n}_{'pivot' if pivot else 'layer'}"
+        namespace: dict = {}
+        exec(compile(_kernel_source(name, n, pivot), f"<{name}>", "exec"), namespace)
+        kernel = namespace[name]
+
+    _kernels[key] = kernel
+    return kernel
+
+
+def _kernel_source(name: str, n: int, pivot: bool) -> str:
+    """generates the source of the unrolled kernel. see get_kernel()."""
+    # cl.append is looked up once per kernel call, rather than once per clique
+    lines = [f"def {name}(masks, i0, p0, cl):", "    emit = cl.append"]
+
+    # depth k has picked nodes i0..ik, and p{k} holds the candidates for the rest
+    for k in range(n - 1):
+        pad = "    " * (k + 1)
+        left = n - k - 1  # nodes still to pick
+
+        # base case. every candidate completes a clique
+        if left == 1:
+            picked = "".join(f"i{j}, " for j in range(k + 1))
+            lines += [
+                f"{pad}while p{k}:",
+                f"{pad}    b = p{k} & -p{k}",
+                f"{pad}    p{k} ^= b",
+                f"{pad}    emit(({picked}b.bit_length() - 1))",
+            ]
+            break
+
+        # with pivot, only branch on the seed's candidates that are not neighbors of
+        # the pivot (see _pivot_branch_set)
+        scan = pivot and k == 0 and left > 2
+        if scan:
+            lines += [
+                f"{pad}best = -1",
+                f"{pad}pv = 0",
+                f"{pad}s = p{k}",
+                f"{pad}while s:",
+                f"{pad}    b = s & -s",
+                f"{pad}    s ^= b",
+                f"{pad}    m = masks[b.bit_length() - 1]",
+                f"{pad}    score = (p{k} & m).bit_count()",
+                f"{pad}    if score > best:",
+                f"{pad}        best = score",
+                f"{pad}        pv = m",
+                f"{pad}c{k} = p{k} & ~pv",
+            ]
+        else:
+            lines.append(f"{pad}c{k} = p{k}")
+
+        # branch on each candidate. without a pivot, what is left of c{k} is exactly
+        # the candidates after i{k+1}, since the bits are visited in ascending order.
+        # so it is intersected directly, and p{k} needs no bookkeeping. this holds
+        # below the seed layer with pivot too, where all the branching is done.
+        lines += [
+            f"{pad}while c{k}:",
+            f"{pad}    b = c{k} & -c{k}",
+            f"{pad}    c{k} ^= b",
+            f"{pad}    i{k + 1} = b.bit_length() - 1",
+        ]
+        if scan:
+            lines += [
+                f"{pad}    p{k} ^= b",
+                f"{pad}    p{k + 1} = p{k} & masks[i{k + 1}]",
+            ]
+        else:
+            lines.append(f"{pad}    p{k + 1} = c{k} & masks[i{k + 1}]")
+
+        # check if there are enough candidates left. the base case loop skips an
+        # empty p{k+1} by itself.
+        if left > 2:
+            lines += [
+                f"{pad}    if not p{k + 1} or p{k + 1}.bit_count() < {left - 1}:",
+                f"{pad}        continue",
+            ]
+    return "\n".join(lines) + "\n"
+
+
+def clique_stack(
+    masks: list[int], n: int, pivot: bool, i0: int, p0: int, cl: list[tuple[int, ...]]
+):
+    """
+    The search for the kernels above MAX_UNROLLED, with the recursion kept on an explicit
+    stack indexed by depth, so no Python frame is made per branch.
+
+    Nodes are enumerated as in the generated kernels: p0 is the bitmask of candidates that
+    may extend i0, and every clique of n nodes is appended to cl.
+
+    Without pivot, p0 must only hold candidates after i0 in index order, and each branch
+    only intersects the candidates after it, so each clique is found once.
+
+    With pivot, this is Bron-Kerbosch with pivoting, limited to cliques of n nodes. Only
+    valid for strict (undirected) graphs, where a clique of num_words is always maximal;
+    otherwise pivoting could skip a clique. Since cliques are reported by size rather than
+    maximality, no excluded set is needed, and the pivot is picked from p alone. The pivot
+    is only used on the seed layer, see _pivot_branch_set.
+
+    n is not validated here, callers are expected to check it once (n >= 2).
+    """
+    # depth d has picked the nodes in prefix[: d + 1], and p_stack[d] holds the
+    # candidates for the rest. c_stack[d] is what is left to branch on at that depth.
+    # prefix is one scratch buffer, overwritten in place as the search moves, and only
+    # copied out when a clique is complete.
+    p_stack = [0] * n
+    c_stack = [0] * n
+    prefix = [i0] * n
+    emit = cl.append
+    p_stack[0] = p0
+    c_stack[0] = _pivot_branch_set(masks, p0) if pivot and n > 3 else p0
+    depth = 0
+    while depth >= 0:
+        left = n - depth - 1  # nodes still to pick
+
+        # base case. every candidate completes a clique, in the last slot of prefix
+        if left == 1:
+            p = p_stack[depth]
+            while p:
+                low = p & -p
+                p ^= low
+                prefix[-1] = low.bit_length() - 1
+                emit(tuple(prefix))
+            depth -= 1
+            continue
+
+        # pop back up once there is nothing left to branch on
+        cands = c_stack[depth]
+        if not cands:
+            depth -= 1
+            continue
+
+        # branch on the lowest candidate
+        low = cands & -cands
+        cands ^= low
+        c_stack[depth] = cands
+        next_idx = low.bit_length() - 1
+
+        # with a pivot, drop next_idx from the candidates, so later branches skip it.
+        # otherwise (and below the seed layer, as in the generated kernels) what is
+        # left of cands is exactly the candidates after next_idx.
+        if pivot and depth == 0 and left > 2:
+            p = p_stack[depth] ^ low
+            p_stack[depth] = p
+            next_n = p & masks[next_idx]
+        else:
+            next_n = cands & masks[next_idx]
+
+        # check if there are enough candidates left. the base case skips an empty
+        # next_n by itself.
+        if left > 2 and (not next_n or next_n.bit_count() < left - 1):
+            continue
+
+        # push the next layer
+        depth += 1
+        prefix[depth] = next_idx
+        p_stack[depth] = next_n
+        c_stack[depth] = next_n
+
+
+def _pivot_branch_set(masks: list[int], p: int) -> int:
+    """
+    candidates of p to branch on: those that are not neighbors of the pivot, the candidate
+    with the most neighbors in p.
+
+    This is only done for the seed's candidates. Deeper down, p is small, and as the search
+    prunes by size, most of the branches a pivot would skip are cut after one AND anyway,
+    so the scan costs more than it saves (about twice the search time on word graphs).
+    Neither is it done when the seed layer is also the last branching layer (n <= 3).
+    """
+    best = -1
+    pivot_n = 0
+    scan = p
+    while scan:
+        low = scan & -scan
+        scan ^= low
+        u_n = masks[low.bit_length() - 1]
+        score = (p & u_n).bit_count()
+        if score > best:
+            best = score
+            pivot_n = u_n
+    return p & ~pivot_n
+
+
+def degeneracy_order(masks: list[int]) -> list[int]:
+    """
+    Orders the nodes by repeatedly removing the node with the fewest remaining neighbors.
+
+    Parameters
+    ----------
+    masks : list[int]
+        neighbor bitmasks of an undirected graph.
+
+    Returns
+    -------
+    list[int]
+        node indexes, in degeneracy order.
+    """
+    # bucket queue, indexed by current degree. entries go stale when a degree drops.
+    degree = [m.bit_count() for m in masks]
+    buckets: list[list[int]] = [[] for _ in range(max(degree, default=0) + 1)]
+    for i, deg in enumerate(degree):
+        buckets[deg].append(i)
+
+    order = []
+    remaining = (1 << len(masks)) - 1
+    d = 0
+    while remaining:
+        # pop the first live node from the smallest non-empty bucket
+        while True:
+            while not buckets[d]:
+                d += 1
+            v = buckets[d].pop()
+            if (remaining >> v) & 1 and degree[v] == d:
+                break
+
+        # remove v, and move its remaining neighbors down a bucket
+        remaining ^= 1 << v
+        order.append(v)
+        nbrs = masks[v] & remaining
+        while nbrs:
+            low = nbrs & -nbrs
+            nbrs ^= low
+            u = low.bit_length() - 1
+            degree[u] -= 1
+            buckets[degree[u]].append(u)
+
+        # the smallest degree can only drop by one per removal
+        d = max(d - 1, 0)
+    return order
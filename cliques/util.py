@@ -38,27 +38,6 @@ class CliqueUtils:
                 results.append(f)
         return results
 
-    @staticmethod
-    def pop_without_remove(s: set):
-        """
-        Returns the result of s.pop() without actually removing the value from the set.
-
-        Parameters
-        ----------
-        s : set
-            The set to from which to retrieve the value.
-
-        Returns
-        -------
-        Any
-            Type of set element. Value is what would be the hypothetical "s[0]"
-        """
-        if not isinstance(s, set) or len(s) <= 0:
-            return None
-        for x in s:
-            break
-        return x
-
     @staticmethod
     def mkdir(d: str, name: str | None = None, logger: logging.Logger | None = None):
         """
@@ -143,10 +122,8 @@ class CliqueUtils:
             raise ValueError("[***] ERROR: File must be .txt")
 
         # read in file contents line-by-line.
-        contents = []
         with open(filepath, "r", encoding="utf-8") as f:
-            for row in f:
-                contents.append(row.strip())
+            contents = [row.strip() for row in f]
 
         # return contents of file
         return contents
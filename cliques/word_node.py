@@ -9,10 +9,10 @@ Metadata
 """
 
 # Standard
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(slots=True)
 class WordNode:
     """
     A node in the graph.
@@ -21,12 +21,20 @@ class WordNode:
     ----------
     word : str
         the word itself
-    char_set : set[str]
-        the set of characters in the word
+    char_mask : int
+        the characters in the word, as a bitmask (bit i is set iff chr(97 + i) is in word)
     neighbors : set[int]
         the set of indices of neighboring words
+    neighbors_bits : int
+        neighbors, as a bitmask (bit j is set iff j is in neighbors). 0 until the graph is
+        computed
+    words : list[str]
+        every word the node stands for, word first. More than one for anagrams, which share
+        a node in strict graphs
     """
 
     word: str
-    char_set: set[str]
+    char_mask: int
     neighbors: set[int]
+    neighbors_bits: int = 0
+    words: list[str] = field(default_factory=list)